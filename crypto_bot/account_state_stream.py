@@ -0,0 +1,182 @@
+"""
+Streams Bybit account updates and keeps the account allocation snapshot fresh.
+
+Runs as a long-lived companion process next to the Chalice app, e.g. on ECS Fargate,
+with the same SECRET_NAME, BASE_CURRENCY, SANDBOX and STATE_TABLE_NAME environment
+variables as the app:
+
+    python account_state_stream.py
+"""
+import os
+import asyncio
+import logging
+import ccxt
+import ccxt.pro
+from typing import Dict
+from chalicelib import utils, trade_processing
+from chalicelib.exchanges.bybit import BybitClient, backoff_delay
+
+logger = logging.getLogger("app")
+
+SNAPSHOT_REFRESH_SECONDS = 300
+
+async def stream_account_state(secret_name: str, base_currency: str, state_table_name: str, sandbox: bool=False):
+    """
+    Keeps the account allocation snapshot up to date from Bybit's balance and execution streams.
+
+    Balance and trade totals are fetched via REST once on start and afterwards updated
+    from the free balance and the fills pushed by Bybit. The snapshot is rewritten from
+    memory every SNAPSHOT_REFRESH_SECONDS without updates, so the Chalice app can rely on
+    it. REST is only used again after stream errors, when updates may have been missed.
+
+    Args:
+        secret_name: The name of the secret in AWS Secrets Manager.
+        base_currency: Currency used for trading and for the calculation of available funds, e.g., USD or USDT.
+        state_table_name: DynamoDB table holding the account allocation snapshot.
+        sandbox (optional): Determines whether to connect to exchange's sandbox env.
+    """
+    client = BybitClient(base_currency, state_table_name=state_table_name)
+    if not client.connect(secret_name, sandbox=sandbox):
+        raise RuntimeError("Failed to connect to bybit.")
+
+    api_key_manager = utils.APIKeyManager(secret_name)
+    exchange = ccxt.pro.bybit({
+        "apiKey": api_key_manager.get_api_key(),
+        "secret": api_key_manager.get_api_secret(),
+        "options": {'defaultType': 'spot' },
+    })
+    if sandbox:
+        exchange.set_sandbox_mode(True)
+
+    state = {"available_funds_usd": None, "stale": True}
+    try:
+        await resync_snapshot(client, state)
+
+        tasks = [
+            asyncio.ensure_future(watch_balance_updates(exchange, client, state)),
+            asyncio.ensure_future(watch_trade_updates(exchange, client, state)),
+            asyncio.ensure_future(refresh_snapshot(client, state)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        await exchange.close()
+
+async def watch_balance_updates(exchange: ccxt.pro.Exchange, client: BybitClient, state: Dict):
+    """
+    Takes the free balance of the base currency from every balance update pushed by Bybit.
+
+    Args:
+        exchange: Bybit WebSocket exchange.
+        client: Connected Bybit client holding the trade totals.
+        state: Shared stream state with the available funds and whether they may be stale.
+    """
+    stream_errors = 0
+    while True:
+        try:
+            balance = await exchange.watch_balance()
+        except ccxt.NetworkError as e:
+            logger.warning(f"Balance stream interrupted due to network error: {e}. Retrying the stream.")
+            state["stale"] = True
+            await asyncio.sleep(backoff_delay(stream_errors))
+            stream_errors += 1
+            continue
+
+        stream_errors = 0
+        available_funds_usd = (balance.get("free") or {}).get(client.base_currency)
+        if available_funds_usd is None:
+            continue
+
+        logger.debug(f"Received balance update: {available_funds_usd} {client.base_currency}")
+        state["available_funds_usd"] = available_funds_usd
+        await update_snapshot(client, state)
+
+async def watch_trade_updates(exchange: ccxt.pro.Exchange, client: BybitClient, state: Dict):
+    """
+    Folds every fill pushed by Bybit into the trade totals of its symbol.
+
+    Args:
+        exchange: Bybit WebSocket exchange.
+        client: Connected Bybit client holding the trade totals.
+        state: Shared stream state with the available funds and whether they may be stale.
+    """
+    stream_errors = 0
+    while True:
+        try:
+            trades = await exchange.watch_my_trades()
+        except ccxt.NetworkError as e:
+            logger.warning(f"Trade stream interrupted due to network error: {e}. Retrying the stream.")
+            state["stale"] = True
+            await asyncio.sleep(backoff_delay(stream_errors))
+            stream_errors += 1
+            continue
+
+        stream_errors = 0
+        trades = sorted(trades, key=lambda trade: trade.get("timestamp") or 0)
+        for symbol in {trade.get("symbol") for trade in trades}:
+            # Fills of symbols without an active strategy don't count towards the allocation
+            if not client.fold_new_trades(symbol, [trade for trade in trades if trade.get("symbol") == symbol]):
+                logger.debug(f"Ignored fills of {symbol} without trade totals.")
+
+        logger.debug(f"Received {len(trades)} fills.")
+        await update_snapshot(client, state)
+
+async def refresh_snapshot(client: BybitClient, state: Dict):
+    """
+    Rewrites the snapshot every SNAPSHOT_REFRESH_SECONDS, so it doesn't age out without updates.
+
+    Args:
+        client: Connected Bybit client holding the trade totals.
+        state: Shared stream state with the available funds and whether they may be stale.
+    """
+    while True:
+        await asyncio.sleep(SNAPSHOT_REFRESH_SECONDS)
+        logger.debug("Refreshing snapshot.")
+        await update_snapshot(client, state)
+
+async def update_snapshot(client: BybitClient, state: Dict):
+    """
+    Writes the snapshot from the streamed state, falling back to REST while it may be stale.
+
+    Args:
+        client: Connected Bybit client holding the trade totals.
+        state: Shared stream state with the available funds and whether they may be stale.
+    """
+    if state["stale"]:
+        await resync_snapshot(client, state)
+        return
+
+    allocation_dict = client.get_allocation_from_trade_states(state["available_funds_usd"], trade_processing.get_active_strategy_configs())
+    client.save_allocation_snapshot(allocation_dict)
+
+async def resync_snapshot(client: BybitClient, state: Dict):
+    """
+    Fetches balance and trade totals via REST and writes the snapshot.
+
+    Args:
+        client: Connected Bybit client holding the trade totals.
+        state: Shared stream state with the available funds and whether they may be stale.
+    """
+    allocation_dict = await asyncio.to_thread(client.get_account_allocation, use_snapshot=False)
+    if allocation_dict is None:
+        logger.warning("Failed to fetch account allocation, the snapshot was not updated.")
+        return
+
+    state["available_funds_usd"] = allocation_dict.get("USD")
+    state["stale"] = False
+    client.save_allocation_snapshot(allocation_dict)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(stream_account_state(
+        os.environ.get("SECRET_NAME"),
+        os.environ.get("BASE_CURRENCY"),
+        os.environ.get("STATE_TABLE_NAME"),
+        sandbox=utils.get_env_var("SANDBOX"),
+    ))
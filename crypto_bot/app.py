@@ -1,11 +1,44 @@
 import os
 import logging
-from chalice import Chalice, Cron
-from chalicelib import utils, trade_processing, trade_execution
+from functools import lru_cache
+from chalice import Chalice, Cron, BadRequestError
+from chalicelib import utils, trade_processing
 
 app = Chalice(app_name="crypto_bot")
 app.log.setLevel(logging.DEBUG)
 
+# Environment is fixed for the lifetime of a Lambda container, resolve it once at cold start
+SECRET_NAME = os.environ.get("SECRET_NAME")
+EXCHANGE_NAME = os.environ.get("EXCHANGE_NAME")
+BASE_CURRENCY = os.environ.get("BASE_CURRENCY")
+TABLE_NAME = os.environ.get("TABLE_NAME")
+STATE_TABLE_NAME = os.environ.get("STATE_TABLE_NAME")
+SANDBOX = utils.get_env_var("SANDBOX")
+
+# Connected exchanges and DynamoDB handles reused across invocations of a warm Lambda container
+_EXCHANGE_CACHE: dict = {}
+_DYNAMODB_MANAGER = utils.DynamoDBManager()
+
+@lru_cache(maxsize=8)
+def _get_table(table_name: str):
+    """Returns the DynamoDB table, sharing one boto3 resource and connection pool."""
+    return _DYNAMODB_MANAGER.get_table(table_name)
+
+def _trade_execution():
+    """Imports trade_execution on first use, keeping ccxt out of the cold start of the database path."""
+    from chalicelib import trade_execution
+    return trade_execution
+
+def _get_exchange(exchange_name: str, base_currency: str, secret_name: str, sandbox: bool):
+    """Returns a connected exchange, reusing the cached instance when available."""
+    key = (exchange_name, base_currency, sandbox)
+    exchange = _EXCHANGE_CACHE.get(key)
+    if exchange is None:
+        exchange = _trade_execution().Exchange(exchange_name, base_currency, state_table_name=STATE_TABLE_NAME)
+    if exchange.connect(secret_name, sandbox=sandbox):
+        _EXCHANGE_CACHE[key] = exchange
+    return exchange
+
 # REST API Endpoint
 @app.route("/receive_trade_signals", methods=["POST"])
 def receive_trade_signals():
@@ -17,45 +50,61 @@ def receive_trade_signals():
     app.log.debug("Trade Signal Processed: %s", trade_out)
 
     if "stop" in trade_out.get("order_comment").lower():
-        secret_name = os.environ.get("SECRET_NAME")
-        exchange_name = os.environ.get("EXCHANGE_NAME")
-        base_currency = os.environ.get("BASE_CURRENCY")
-        sandbox = utils.get_env_var("SANDBOX")
-
-        exchange = trade_execution.Exchange(exchange_name, base_currency)
-        exchange.connect(secret_name, sandbox=sandbox)
-        app.log.debug(f"Succesfully connected to exchange: {exchange_name}")
+        exchange = _get_exchange(EXCHANGE_NAME, BASE_CURRENCY, SECRET_NAME, SANDBOX)
+        app.log.debug(f"Succesfully connected to exchange: {EXCHANGE_NAME}")
 
-        order = trade_execution.execute_long_stop(exchange, trade_out, increment_pct=0.001)
+        order = _trade_execution().execute_long_stop(exchange, trade_out, increment_pct=0.001)
         app.log.info(f"Successfully executed stop loss order: {order}")
     else:
-        table_name = os.environ.get("TABLE_NAME")
-        dynamodb_manager = utils.DynamoDBManager()
-        table = dynamodb_manager.get_table(table_name)
-        app.log.debug("Established connection to %s database", table_name)
+        table = _get_table(TABLE_NAME)
+        app.log.debug("Established connection to %s database", TABLE_NAME)
 
         table.put_item(Item=trade_out)
         app.log.info("Trade on %s at %s saved to database.", trade_out['ticker'], trade_out['create_ts'])
 
+@app.route("/receive_trade_signals_batch", methods=["POST"])
+def receive_trade_signals_batch():
+    """Receives a list of trade signals via post request, batch writes them to database and executes stop losses."""
+    trades_in = app.current_request.json_body
+    app.log.debug("Trade Signals Received: %s", trades_in)
+
+    if not isinstance(trades_in, list):
+        raise BadRequestError("Expected a JSON list of trade signals.")
+
+    trades_out = [trade_processing.preprocess_trade_signal(trade_in) for trade_in in trades_in]
+    app.log.debug("Trade Signals Processed: %s", trades_out)
+
+    stop_trades = [trade for trade in trades_out if "stop" in trade.get("order_comment").lower()]
+    save_trades = [trade for trade in trades_out if "stop" not in trade.get("order_comment").lower()]
+
+    # Save signals first, so a failing stop loss doesn't lose the rest of the batch
+    if save_trades:
+        table = _get_table(TABLE_NAME)
+        app.log.debug("Established connection to %s database", TABLE_NAME)
+
+        utils.batch_write_items(table, save_trades)
+        app.log.info("%d trades saved to database.", len(save_trades))
+
+    if stop_trades:
+        exchange = _get_exchange(EXCHANGE_NAME, BASE_CURRENCY, SECRET_NAME, SANDBOX)
+        app.log.debug(f"Succesfully connected to exchange: {EXCHANGE_NAME}")
+
+        for trade_out in stop_trades:
+            order = _trade_execution().execute_long_stop(exchange, trade_out, increment_pct=0.001)
+            app.log.info(f"Successfully executed stop loss order: {order}")
+
 # Scheduled Lambda Function 
 @app.schedule(Cron("1", "0,8,16", "*", "*", "?", "*"))
 def execute_trade_signals(event):
-    table_name = os.environ.get("TABLE_NAME")
     utcnow = utils.get_utc_now_rounded()
-    trades = trade_processing.get_all_recent_signals(utcnow, table_name)
+    trades = trade_processing.get_all_recent_signals(utcnow, TABLE_NAME, _get_table(TABLE_NAME))
     if trades:
         app.log.debug(f"Succesfully retrieved trade signals from database: {trades}")
 
-        secret_name = os.environ.get("SECRET_NAME")
-        exchange_name = os.environ.get("EXCHANGE_NAME")
-        base_currency = os.environ.get("BASE_CURRENCY")
-        sandbox = utils.get_env_var("SANDBOX")
-
-        exchange = trade_execution.Exchange(exchange_name, base_currency)
-        exchange.connect(secret_name, sandbox=sandbox)
-        app.log.debug(f"Succesfully connected to exchange: {exchange_name}")
+        exchange = _get_exchange(EXCHANGE_NAME, BASE_CURRENCY, SECRET_NAME, SANDBOX)
+        app.log.debug(f"Succesfully connected to exchange: {EXCHANGE_NAME}")
 
-        orders = trade_execution.buy_side_boost(exchange, trades, increment_pct=0.001)
+        orders = _trade_execution().buy_side_boost(exchange, trades, increment_pct=0.001)
         if orders:
             app.log.info(f"Successfully placed order(s): {orders}")
     else:
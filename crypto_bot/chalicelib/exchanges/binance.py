@@ -9,6 +9,8 @@ from chalicelib import utils, trade_processing
 
 logger = logging.getLogger("app")
 
+MARKETS_TTL_SECONDS = 3_600
+
 class BinanceClient:
     """
     Binance spot exchange
@@ -18,6 +20,9 @@ class BinanceClient:
     - The binance API key must be set to allow connections from any IP address (disable default security controlls in API settings, IP restrictions can still be set).
     """
 
+    # Requests are signed with a timestamp and recvWindow, so private calls may overlap
+    concurrent_orders = True
+
     def __init__(self, base_currency: str):
         """
         Initialization with the base currency.
@@ -26,6 +31,7 @@ class BinanceClient:
             base_currency: Currency used for trading and for the calculation of available funds, e.g., USD or USDT.
         """
         self.client = None
+        self.markets_loaded_at = None
 
         if not base_currency:
             raise ValueError("base currency not set")
@@ -47,6 +53,13 @@ class BinanceClient:
         retries = 0
         while retries < max_retries:
             try:
+                # Reuse the connection of a warm container, only refreshing stale markets
+                if self.client is not None:
+                    if time.monotonic() - self.markets_loaded_at > MARKETS_TTL_SECONDS:
+                        self.markets = self.client.load_markets(reload=True)
+                        self.markets_loaded_at = time.monotonic()
+                    return True
+
                 api_key_manager = utils.APIKeyManager(secret_name)
                 api_key = api_key_manager.get_api_key()
                 api_secret = api_key_manager.get_api_secret()
@@ -76,6 +89,7 @@ class BinanceClient:
                 #logger.debug(json.dumps(self.markets))
 
                 self.client = exchange
+                self.markets_loaded_at = time.monotonic()
                 return True
             
             except ccxt.NetworkError as e:
@@ -361,14 +375,11 @@ class BinanceClient:
                     prev_trade_side = None
                     for i, trade in enumerate(reversed(trades)):
                         side = trade.get("side")
-                        if (prev_trade_side == "buy") & (side == "sell"):
+                        if prev_trade_side == "buy" and side == "sell":
                             most_recent_trade = trades[-i:]
                             logger.debug(f"Retrieved most recent trade with open and close transactions: {most_recent_trade}")
                             return most_recent_trade
-                        elif side == "buy":
-                            prev_trade_side = "buy"
-                        elif side == "sell":
-                            prev_trade_side = "sell"
+                        prev_trade_side = side
                     else:
                         return trades
                 else:
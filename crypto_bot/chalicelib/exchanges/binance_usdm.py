@@ -10,6 +10,8 @@ from chalicelib import utils, trade_processing
 
 logger = logging.getLogger("app")
 
+MARKETS_TTL_SECONDS = 3_600
+
 class BinanceUsdmClient:
     """
     Binance USDM futures exchange
@@ -22,6 +24,9 @@ class BinanceUsdmClient:
     - Amount_multiplier is used to allow for sufficient margin and must be below the leverage setting (see __init__ method), e.g. 0.99 to adjust the order amount to 99%.
     """
 
+    # Requests are signed with a timestamp and recvWindow, so private calls may overlap
+    concurrent_orders = True
+
     def __init__(self, base_currency: str):
         """
         Initialization with the base currency.
@@ -34,6 +39,7 @@ class BinanceUsdmClient:
             amount_multiplier: The order amount is multiplied by this factor to allow for sufficient margin. E.g., 0.99 to adjust to 99% with leverage 1.
         """
         self.client = None
+        self.markets_loaded_at = None
 
         if not base_currency:
             raise ValueError("base currency not set")
@@ -59,6 +65,13 @@ class BinanceUsdmClient:
         retries = 0
         while retries < max_retries:
             try:
+                # Reuse the connection of a warm container, only refreshing stale markets
+                if self.client is not None:
+                    if time.monotonic() - self.markets_loaded_at > MARKETS_TTL_SECONDS:
+                        self.markets = self.client.load_markets(reload=True)
+                        self.markets_loaded_at = time.monotonic()
+                    return True
+
                 api_key_manager = utils.APIKeyManager(secret_name)
                 api_key = api_key_manager.get_api_key()
                 api_secret = api_key_manager.get_api_secret()
@@ -88,6 +101,7 @@ class BinanceUsdmClient:
                 logger.debug(json.dumps(self.markets))
 
                 self.client = exchange
+                self.markets_loaded_at = time.monotonic()
                 return True
 
             except ccxt.NetworkError as e:
@@ -418,14 +432,11 @@ class BinanceUsdmClient:
                     prev_trade_side = None
                     for i, trade in enumerate(reversed(trades)):
                         side = trade.get("side")
-                        if (prev_trade_side == "buy") & (side == "sell"):
+                        if prev_trade_side == "buy" and side == "sell":
                             most_recent_trade = trades[-i:]
                             logger.debug(f"Retrieved most recent trade with open and close transactions: {most_recent_trade}")
                             return most_recent_trade
-                        elif side == "buy":
-                            prev_trade_side = "buy"
-                        elif side == "sell":
-                            prev_trade_side = "sell"
+                        prev_trade_side = side
                     else:
                         return trades
                 else:
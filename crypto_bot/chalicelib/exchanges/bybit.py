@@ -1,14 +1,51 @@
+import os
 import sys
 import time
+import random
 import logging
+import threading
 import ccxt
 import json
+import uuid
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Union, Dict, List
+from typing import ClassVar, Union, Dict, List
 from chalicelib import utils, trade_processing
 
 logger = logging.getLogger("app")
 
+MARKETS_TTL_SECONDS = 3_600
+MARKETS_CACHE_DIR = "/tmp"  # Lambda's writable tmpfs survives warm invocations
+MARKETS_ATTRIBUTES = ("markets", "markets_by_id", "symbols", "ids", "currencies", "currencies_by_id", "codes")
+MAX_WORKERS = 8
+TRADES_LIMIT = 50  # Bounds the fills scanned per symbol, keeping the per-fill loops cheap in pure Python
+TRADES_SINCE_WINDOW_MS = 7 * 24 * 60 * 60 * 1000  # Bybit only returns fills up to 7 days after startTime
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 0.1
+RATE_LIMIT_BACKOFF_BASE_SECONDS = 1  # Rate limits and DDoS protection need longer than transient network errors
+BACKOFF_MAX_SECONDS = 5
+ALLOCATION_SNAPSHOT_MAX_AGE_SECONDS = 600
+TICKER_TTL_SECONDS = 0.5
+SIDE_SIGNS = {"buy": 1, "sell": -1}
+DUPLICATE_ORDER_LINK_ID_CODES = ("12141", "110072", "170141")
+
+def to_decimal(value) -> Union[Decimal, None]:
+    """Converts a ccxt number to Decimal, passing through None and Decimal values."""
+    if value is None or isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+def backoff_delay(attempt: int, base: float=BACKOFF_BASE_SECONDS) -> float:
+    """Returns the exponential backoff with jitter to wait before retrying a failed call."""
+    delay = base * (2 ** attempt) + random.random() * base
+    return min(delay, BACKOFF_MAX_SECONDS)
+
+def sleep_backoff(attempt: int, error: Exception=None):
+    """Sleeps with exponential backoff and jitter before retrying a failed call, backing off longer when rate limited."""
+    base = RATE_LIMIT_BACKOFF_BASE_SECONDS if isinstance(error, ccxt.DDoSProtection) else BACKOFF_BASE_SECONDS
+    time.sleep(backoff_delay(attempt, base))
+
 class BybitClient:
     """
     Bybit spot exchange
@@ -17,28 +54,46 @@ class BybitClient:
     - This is an initial implementation, use at your own risk.
     """
 
-    def __init__(self, base_currency: str):
+    # Requests are signed with a timestamp and recv_window, so private calls may overlap
+    concurrent_orders = True
+
+    # Loaded markets shared by all clients of the process, keyed by sandbox
+    markets_cache: ClassVar[Dict] = {}
+    markets_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, base_currency: str, markets: Dict=None, state_table_name: str=None):
         """
         Initialization with the base currency.
 
         Args:
             base_currency: Currency used for trading and for the calculation of available funds, e.g., USD or USDT.
+            markets (optional): Preloaded markets, skips load_markets on connect.
+            state_table_name (optional): DynamoDB table holding the account allocation snapshot
+            written by account_state_stream.py. Allocations are always fetched via REST if not set.
         """
 
         self.client = None
+        self.sandbox = False
+        self.markets = markets
+        self.markets_loaded_at = time.monotonic() if markets else None
+        self.state_table_name = state_table_name
+        self.dynamodb_manager = utils.DynamoDBManager()
+        self.last_order_at = 0
+        self.trade_states = dict()
+        self.tickers = dict()
 
         if not base_currency:
             raise ValueError("base currency not set")
         self.base_currency = base_currency
 
-    def connect(self, secret_name: str, sandbox: bool=False, max_retries: int=3) -> bool:
+    def connect(self, secret_name: str, sandbox: bool=False, max_retries: int=MAX_RETRIES) -> bool:
         """
         Establishes connection to Bybit exchange.
 
         Args:
             secret_name: The name of the secret in AWS Secrets Manager.
             sandbox (optional): Determines whether to connect to exchange's sandbox env.
-            max_retries (optional): Maximum number of retries. Defaults to 3.
+            max_retries (optional): Maximum number of retries. Defaults to MAX_RETRIES.
 
         Returns:
             bool: True if connection is successful, False otherwise.
@@ -46,6 +101,12 @@ class BybitClient:
         retries = 0
         while retries < max_retries:
             try:
+                # Reuse the connection of a warm container, only refreshing stale markets
+                if self.client is not None:
+                    if self.markets_expired():
+                        self.load_markets(self.client, sandbox, reload=True)
+                    return True
+
                 api_key_manager = utils.APIKeyManager(secret_name)
                 api_key = api_key_manager.get_api_key()
                 api_secret = api_key_manager.get_api_secret()
@@ -56,13 +117,21 @@ class BybitClient:
                     "apiKey": api_key,
                     "secret": api_secret,
                     "options": {'defaultType': 'spot' },
+                    # ccxt keeps a requests.Session per instance, keep its connections alive between calls
+                    "headers": {
+                        "Connection": "keep-alive",
+                        "Keep-Alive": "timeout=60, max=1000",
+                    },
                     # TODO: proxy testing
                     #"proxies": {
                     #    "socksProxy": proxy,
                     #    "wsSocksProxy": proxy,
                     #},
-                    "timeout": 6_000
+                    "timeout": 6_000,
+                    # Bybit quotes its numbers, so responses can be decoded natively by orjson
+                    "quoteJsonNumbers": False,
                 })
+                exchange.on_json_response = orjson.loads
 
                 # TODO: proxy testing
                 #if proxy:
@@ -72,15 +141,19 @@ class BybitClient:
                 if sandbox:
                     exchange.set_sandbox_mode(True)
 
-                self.markets = exchange.load_markets()
+                if self.markets:
+                    exchange.set_markets(self.markets)
+                else:
+                    self.load_markets(exchange, sandbox)
                 #logger.debug(json.dumps(self.markets))
 
                 self.client = exchange
+                self.sandbox = sandbox
                 return True
 
             except ccxt.NetworkError as e:
                 logger.error(f"Connection failed due to Network error: {str(e)}. Retrying the call.")
-                time.sleep(3)
+                sleep_backoff(retries, e)
                 retries +=1
             except ccxt.ExchangeError as e:
                 logger.error(f"Exchange error while connecting: {e}")
@@ -92,7 +165,84 @@ class BybitClient:
         logger.error(f"Failed to connect to exchange after {max_retries} retries.")
         return False
 
-    def create_limit_order(self, symbol: str, side: str, amount: float, order_price: float, max_retries: int=3):
+    def load_markets(self, exchange: ccxt.Exchange, sandbox: bool=False, reload: bool=False):
+        """
+        Loads markets into the exchange, preferring markets already loaded by this process.
+
+        Markets are shared by all clients of the process through markets_cache. When they
+        are missing or older than MARKETS_TTL_SECONDS they are read from the disk cache or
+        fetched from the exchange, see read_or_fetch_markets.
+
+        Args:
+            exchange: The exchange object from ccxt.
+            sandbox (optional): Whether the exchange is in sandbox mode, markets are cached per environment.
+            reload (optional): Skips the caches and fetches markets from the exchange.
+        """
+        with BybitClient.markets_lock:
+            shared = BybitClient.markets_cache.get(sandbox)
+            if reload or shared is None or time.monotonic() - shared[0] > MARKETS_TTL_SECONDS:
+                self.read_or_fetch_markets(exchange, sandbox, reload)
+                shared = (self.markets_loaded_at, {attribute: getattr(exchange, attribute) for attribute in MARKETS_ATTRIBUTES})
+                BybitClient.markets_cache[sandbox] = shared
+            else:
+                for attribute, value in shared[1].items():
+                    setattr(exchange, attribute, value)
+                self.markets = exchange.markets
+                self.markets_loaded_at = shared[0]
+                logger.debug("Loaded markets shared by other clients")
+
+    def read_or_fetch_markets(self, exchange: ccxt.Exchange, sandbox: bool=False, reload: bool=False):
+        """
+        Loads markets into the exchange, preferring markets cached on disk.
+
+        Markets cached within MARKETS_TTL_SECONDS are read from MARKETS_CACHE_DIR,
+        otherwise they are fetched from the exchange and written back to the cache.
+
+        Args:
+            exchange: The exchange object from ccxt.
+            sandbox (optional): Whether the exchange is in sandbox mode, markets are cached per environment.
+            reload (optional): Skips the disk cache and fetches markets from the exchange.
+        """
+        cache_path = os.path.join(MARKETS_CACHE_DIR, "bybit_markets_sandbox.json" if sandbox else "bybit_markets.json")
+
+        if not reload:
+            try:
+                cache_age = time.time() - os.path.getmtime(cache_path)
+                if cache_age < MARKETS_TTL_SECONDS:
+                    with open(cache_path, "rb") as f:
+                        cached = orjson.loads(f.read())
+                    exchange.set_markets(cached["markets"], cached["currencies"])
+                    self.markets = exchange.markets
+                    self.markets_loaded_at = time.monotonic() - cache_age
+                    logger.debug(f"Loaded markets from {cache_path}")
+                    return
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Failed to read markets cache {cache_path}: {e}")
+
+        self.markets = exchange.load_markets(reload=reload)
+        self.markets_loaded_at = time.monotonic()
+
+        try:
+            payload = orjson.dumps({"markets": exchange.markets, "currencies": exchange.currencies})
+            with open(cache_path, "wb") as f:
+                f.write(payload)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write markets cache {cache_path}: {e}")
+
+    def markets_expired(self) -> bool:
+        """
+        Checks whether the loaded markets are older than MARKETS_TTL_SECONDS.
+
+        Returns:
+            bool: True if markets were never loaded or are stale, False otherwise.
+        """
+        if self.markets_loaded_at is None:
+            return True
+        return time.monotonic() - self.markets_loaded_at > MARKETS_TTL_SECONDS
+
+    def create_limit_order(self, symbol: str, side: str, amount: float, order_price: float, max_retries: int=MAX_RETRIES):
         """
         Places a limit buy order on the bybit exchange.
 
@@ -101,33 +251,44 @@ class BybitClient:
             side: 'buy' or 'sell'.
             amount: Amount of currency to buy
             order_price: Price to place sell order at.
-            max_retries: Maximum number of retry attempts. Defaults to 3.
+            max_retries: Maximum number of retry attempts. Defaults to MAX_RETRIES.
 
         Returns:
             dict or None: The order object if the order was successfully placed,
             or None if an error occurred.
         """
+        # Allocation snapshots written before this order no longer reflect the account
+        self.last_order_at = time.time()
+
+        # Retries reuse the orderLinkId, so Bybit rejects them if a timed out attempt went through
+        order_link_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:16]}"
+
         retries = 0
         while retries < max_retries:
             try:
-                order = self.client.create_limit_order(symbol, side, amount, order_price)
-                logger.debug(f"Created limit order: {symbol} {side} {amount} {order_price}")
+                order = self.client.create_limit_order(symbol, side, amount, order_price, params={"clientOrderId": order_link_id})
+                logger.debug(f"Created limit order: {symbol} {side} {amount} {order_price} {order_link_id}")
                 return order
 
             except ccxt.NetworkError as e:
-                if e == ccxt.RequestTimeout:
-                    # Check if the order was placed
-                    orders = self.client.fetch_open_orders(symbol)
-                    if orders:
-                        logger.info(f"RequestTimeout occurred: Confirmed buy order placed by fetching open orders.")
-                        return orders[0]
-
                 # Increment retry count
                 logger.warning(f"Place sell failed due to network error: {str(e)}. Retrying the call.")
-                time.sleep(3)  # Adding a delay before retrying
+                sleep_backoff(min(retries, 4), e)  # Keep order placement retries short
                 retries += 1
 
             except ccxt.ExchangeError as e:
+                if retries > 0 and any(f'"retCode":{code}' in str(e) for code in DUPLICATE_ORDER_LINK_ID_CODES):
+                    logger.info(f"Order {order_link_id} was placed by a previous attempt that timed out.")
+                    return {
+                        "id": None,
+                        "clientOrderId": order_link_id,
+                        "symbol": symbol,
+                        "type": "limit",
+                        "side": side,
+                        "amount": amount,
+                        "price": order_price,
+                    }
+
                 logger.error(f"Exchange error occurred: {e}")
                 return None
 
@@ -138,14 +299,14 @@ class BybitClient:
         logger.error(f"Failed to place sell order after {max_retries} retries.")
         return None
 
-    def get_total_currency(self, currency: str, max_retries: int=3) -> Union[Decimal, None]:
+    def get_total_currency(self, currency: str, max_retries: int=MAX_RETRIES) -> Union[Decimal, None]:
         """
         Get the total amount of a given currency owned by the account.
 
         Args:
             exchange: The exchange object from ccxt.
             currency: The currency symbol to retrieve from the account balance.
-            max_retries (optional): Maximum number of retries. Defaults to 3.
+            max_retries (optional): Maximum number of retries. Defaults to MAX_RETRIES.
 
         Returns:
             Total number of the given currency owned by the account, or None if not found.
@@ -160,7 +321,7 @@ class BybitClient:
                 if currency in balance:
                     total_currency = balance[currency].get("total", 0)
                     logger.debug(f"Retrieved total currency {currency}: {total_currency}")
-                    return Decimal(str(total_currency))
+                    return to_decimal(total_currency)
                 else:
                     # Currency not found in the balance
                     logger.warning(f"Currency '{currency}' not found in the account balance.")
@@ -168,7 +329,7 @@ class BybitClient:
 
             except ccxt.NetworkError as e:
                 logger.error(f"{self.client.id} fetch_balance failed due to a network error: {str(e)}")
-                time.sleep(3)
+                sleep_backoff(retries, e)
                 retries += 1
 
             except ccxt.ExchangeError as e:
@@ -183,7 +344,27 @@ class BybitClient:
         logger.error(f"Failed to fetch account balance after {max_retries} retries.")
         return None
 
-    def get_bid_ask(self, symbol: str, max_retries: int=3) -> tuple:
+    def fetch_ticker(self, symbol: str) -> Dict:
+        """
+        Fetch ticker of symbol, reusing tickers fetched within TICKER_TTL_SECONDS.
+
+        Args:
+            symbol: Uppercase string literal name of a pair of traded currencies
+            with a slash in between.
+
+        Returns:
+            Dict: The ticker structure from ccxt.
+        """
+        cached = self.tickers.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < TICKER_TTL_SECONDS:
+            return cached[1]
+
+        fetched_at = time.monotonic()
+        ticker = self.client.fetch_ticker(symbol)
+        self.tickers[symbol] = (fetched_at, ticker)
+        return ticker
+
+    def get_bid_ask(self, symbol: str, max_retries: int=MAX_RETRIES) -> tuple:
         """
         Get bid ask spread of symbol on exchange.
 
@@ -191,7 +372,7 @@ class BybitClient:
             exchange: The exchange object from ccxt.
             symbol: Uppercase string literal name of a pair of traded currencies
             with a slash in between.
-            max_retries (optional): Maximum number of retries. Defaults to 3.
+            max_retries (optional): Maximum number of retries. Defaults to MAX_RETRIES.
 
         Returns:
             Tuple containing current bid and ask price of symbol on exchange.
@@ -206,11 +387,10 @@ class BybitClient:
                 if not isinstance(symbol, str):
                     raise ValueError("symbol must be a string")
 
-                # Fetch ticker
-                ticker = self.client.fetch_ticker(symbol)
+                ticker = self.fetch_ticker(symbol)
 
-                bid = Decimal(str(ticker.get("bid"))) if ticker.get("bid") is not None else None
-                ask = Decimal(str(ticker.get("ask"))) if ticker.get("ask") is not None else None
+                bid = to_decimal(ticker.get("bid"))
+                ask = to_decimal(ticker.get("ask"))
 
                 logger.debug(f"Retrieved bid and ask for {symbol}: {bid} {ask}")
 
@@ -218,7 +398,7 @@ class BybitClient:
 
             except ccxt.NetworkError as e:
                 logger.error(f"Network error while fetching ticker: {e}")
-                time.sleep(3)
+                sleep_backoff(retries, e)
                 retries += 1
 
             except ccxt.ExchangeError as e:
@@ -233,14 +413,14 @@ class BybitClient:
         logger.error(f"Failed to fetch ticker after {max_retries} retries.")
         return None, None
 
-    def get_last_price(self, symbol: str, max_retries: int=3) -> Decimal:
+    def get_last_price(self, symbol: str, max_retries: int=MAX_RETRIES) -> Decimal:
         """
         Get last price of symbol on exchange.
 
         Args:
             symbol: Uppercase string literal name of a pair of traded currencies
             with a slash in between.
-            max_retries (optional): Maximum number of retries. Defaults to 3.
+            max_retries (optional): Maximum number of retries. Defaults to MAX_RETRIES.
 
         Returns:
             Last price of symbol on exchange as Decimal object.
@@ -255,10 +435,9 @@ class BybitClient:
                 if not isinstance(symbol, str):
                     raise ValueError("symbol must be a string")
 
-                # Fetch ticker
-                ticker = self.client.fetch_ticker(symbol)
+                ticker = self.fetch_ticker(symbol)
 
-                last = Decimal(str(ticker.get("last"))) if ticker.get("last") is not None else None
+                last = to_decimal(ticker.get("last"))
 
                 logger.debug(f"Retrieved last price for {symbol}: {last}")
 
@@ -266,7 +445,7 @@ class BybitClient:
 
             except ccxt.NetworkError as e:
                 logger.error(f"Network error while fetching ticker: {e}")
-                time.sleep(3)
+                sleep_backoff(retries, e)
                 retries += 1
 
             except ccxt.ExchangeError as e:
@@ -281,43 +460,44 @@ class BybitClient:
         logger.error(f"Failed to fetch ticker after {max_retries} retries.")
         return None
 
-    def get_account_allocation(self, max_retries: int=3) -> Dict:
+    def get_account_allocation(self, max_retries: int=MAX_RETRIES, use_snapshot: bool=True) -> Dict:
         """
         Gets the cost in usd at time of purchase for each active strategy in the account.
 
+        A fresh snapshot written by the account state stream is used when available,
+        otherwise the allocation is calculated from balance and trades fetched via REST.
+
         Args:
-            max_retries (optional): Maximum number of retries. Defaults to 3.
+            max_retries (optional): Maximum number of retries. Defaults to MAX_RETRIES.
+            use_snapshot (optional): Whether to read the allocation snapshot first. Defaults to True.
 
         Returns:
             Dict: A dictionary containing the allocation of the account.
         """
+        if use_snapshot:
+            allocation_dict = self.get_allocation_snapshot()
+            if allocation_dict is not None:
+                logger.debug(f"Allocations from snapshot: {allocation_dict}")
+                return allocation_dict
+
         retries = 0
         while retries < max_retries:
             try:
-                balance = self.client.fetch_balance()
-                available_funds_usd = balance.get("free").get(self.base_currency)
-                logger.debug(f"Available funds in {self.base_currency}: {available_funds_usd}")
                 active_configs = trade_processing.get_active_strategy_configs()
                 logger.debug(f"Active strategy: {active_configs}")
-                allocation_dict = dict()
-                allocation_dict["USD"] = available_funds_usd
-                for config in active_configs:
-                    symbol = config.get("symbol")
-                    currency = config.get("currency")
-                    trades = self.get_most_recent_trade(symbol)
-                    if trades:
-                        trade_value_usd = self.get_trade_value_usd(trades)
-                        logger.debug(f"Found most recent trade for {symbol}. The value still owned will be considered in the allocation: {trade_value_usd}.")
-                        allocation_dict[currency] = trade_value_usd
-                    else:
-                        logger.debug(f"Found no trades for {symbol}. It will not be considered in the allocation.")
-                        allocation_dict[currency] = 0
-                logger.debug(f"Allocations: {allocation_dict}")
-                return allocation_dict
+
+                # Fetch balance and trades of every active strategy concurrently
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    balance_future = executor.submit(self.client.fetch_balance)
+                    list(executor.map(lambda config: self.get_trade_state(config.get("symbol")), active_configs))
+                    balance = balance_future.result()
+
+                available_funds_usd = balance.get("free").get(self.base_currency)
+                return self.get_allocation_from_trade_states(available_funds_usd, active_configs)
 
             except ccxt.NetworkError as e:
                 logger.error(f"Network error while fetching ticker: {e}")
-                time.sleep(3)
+                sleep_backoff(retries, e)
                 retries += 1
 
             except ccxt.ExchangeError as e:
@@ -328,89 +508,251 @@ class BybitClient:
                 logger.error(f"An unexpected error occurred: {e}")
                 raise e
 
-    def get_total_usd(self) -> float:
+    def get_allocation_from_trade_states(self, available_funds_usd: float, active_configs: List[Dict]) -> Dict:
+        """
+        Calculates the account allocation from the available funds and the current trade totals.
+
+        Args:
+            available_funds_usd: Free balance of the base currency.
+            active_configs: Strategy configs of the active strategies.
+
+        Returns:
+            Dict: A dictionary containing the allocation of the account.
+        """
+        logger.debug(f"Available funds in {self.base_currency}: {available_funds_usd}")
+        allocation_dict = dict()
+        allocation_dict["USD"] = available_funds_usd
+        for config in active_configs:
+            symbol = config.get("symbol")
+            currency = config.get("currency")
+            trade_state = self.trade_states.get(symbol)
+            if trade_state:
+                trade_value_usd = self.get_value_owned_usd(trade_state["cost"], trade_state["amount_bought"], trade_state["amount_owned"])
+                logger.debug(f"Found most recent trade for {symbol}. The value still owned will be considered in the allocation: {trade_value_usd}.")
+                allocation_dict[currency] = trade_value_usd
+            else:
+                logger.debug(f"Found no trades for {symbol}. It will not be considered in the allocation.")
+                allocation_dict[currency] = 0
+        logger.debug(f"Allocations: {allocation_dict}")
+        return allocation_dict
+
+    def get_allocation_snapshot(self) -> Union[Dict, None]:
+        """
+        Gets the account allocation snapshot from the state table.
+
+        Snapshots older than ALLOCATION_SNAPSHOT_MAX_AGE_SECONDS or written before the
+        last order placed by this client are ignored.
+
+        Returns:
+            Dict: The allocation of the account, or None if no fresh snapshot is available.
+        """
+        if not self.state_table_name:
+            return None
+
+        try:
+            table = self.dynamodb_manager.get_table(self.state_table_name)
+            item = table.get_item(Key=self.allocation_snapshot_key()).get("Item")
+        except Exception as e:
+            logger.warning(f"Failed to read allocation snapshot: {e}")
+            return None
+
+        if not item:
+            return None
+
+        updated_at = float(item.get("updated_at", 0))
+        if updated_at < self.last_order_at or time.time() - updated_at > ALLOCATION_SNAPSHOT_MAX_AGE_SECONDS:
+            logger.debug(f"Allocation snapshot from {updated_at} is stale.")
+            return None
+
+        return item.get("allocation")
+
+    def save_allocation_snapshot(self, allocation_dict: Dict):
+        """
+        Writes the account allocation snapshot to the state table.
+
+        Args:
+            allocation_dict: The allocation of the account.
+        """
+        table = self.dynamodb_manager.get_table(self.state_table_name)
+        table.put_item(Item={
+            **self.allocation_snapshot_key(),
+            "allocation": utils.convert_floats_to_decimals(allocation_dict),
+            "updated_at": Decimal(str(time.time())),
+        })
+        logger.debug(f"Saved allocation snapshot: {allocation_dict}")
+
+    def allocation_snapshot_key(self) -> Dict:
+        """
+        Gets the state table key of the allocation snapshot.
+
+        Snapshots are kept per environment and base currency, so sandbox and live streams can share a table.
+
+        Returns:
+            Dict: The key of the snapshot item.
+        """
+        environment = "sandbox" if self.sandbox else "live"
+        return {"exchange": f"bybit:{environment}:{self.base_currency}"}
+
+    def get_total_usd(self) -> Union[Decimal, None]:
         """
         Get total USD value of account before any unrealized trades.
 
         This function allows us to correctly allocate funds to a given strategy.
 
         Returns:
-            Total funds of account in USD.
+            Total funds of account in USD, or None if the allocation could not be retrieved.
         """
         allocation_dict = self.get_account_allocation()
-        sum = Decimal(str(sum(allocation_dict.values())))
-        logger.debug(f"Calculated total USD: {sum}")
+        if allocation_dict is None:
+            return None
+
+        total_usd = sum((to_decimal(value or 0) for value in allocation_dict.values()), start=Decimal(0))
+        logger.debug(f"Calculated total USD: {total_usd}")
+        return total_usd
 
-    def get_most_recent_trade(self, symbol: str, max_retries: int=3) -> List[Dict]:
+    def get_trade_state(self, symbol: str, max_retries: int=MAX_RETRIES) -> Union[Dict, None]:
         """
-        Get the most recent open or closed trade of given symbol.
+        Get the running totals of the most recent trade of given symbol.
 
-        A trade starts with a buy and ends with a sell that sets balance to 0.
+        Totals are kept per symbol and checkpointed at the last fill seen, so calls on a
+        warm client only fetch and fold fills from the checkpoint on. When the checkpoint
+        is older than TRADES_SINCE_WINDOW_MS or can't be matched with the fetched fills,
+        the latest fills are fetched instead and the totals rebuilt from them if needed.
 
         Args:
             symbol: Uppercase string literal name of a pair of traded currencies
-            max_retries (optional): Maximum number of retries. Defaults to 3.
+            max_retries (optional): Maximum number of retries. Defaults to MAX_RETRIES.
 
         Returns:
-            List[Dict]: A list of dictionaries containing the order fills related to the last trade.
+            Dict: Totals with the keys amount_bought, amount_owned and cost, or None if there are no trades.
         """
         retries = 0
         while retries < max_retries:
             try:
-                trades = self.client.fetch_my_trades(symbol)
-                if trades:
-                    prev_trade_side = None
-                    for i, trade in enumerate(reversed(trades)):
-                        side = trade.get("side")
-                        if (prev_trade_side == "buy") & (side == "sell"):
-                            most_recent_trade = trades[-i:]
-                            logger.debug(f"Retrieved most recent trade with open and close transactions: {most_recent_trade}")
-                            return most_recent_trade
-                        elif side == "buy":
-                            prev_trade_side = "buy"
-                        elif side == "sell":
-                            prev_trade_side = "sell"
-                    else:
-                        return trades
-                else:
-                    return []
+                trade_state = self.trade_states.get(symbol)
+                new_trades = None
+                if trade_state is not None and time.time() * 1000 - trade_state["timestamp"] < TRADES_SINCE_WINDOW_MS:
+                    trades = self.client.fetch_my_trades(symbol, since=trade_state["timestamp"], limit=TRADES_LIMIT)
+                    new_trades = self.trades_after_checkpoint(trade_state, trades)
+
+                if new_trades is None:
+                    trades = self.client.fetch_my_trades(symbol, limit=TRADES_LIMIT)
+                    new_trades = self.trades_after_checkpoint(trade_state, trades)
+
+                if new_trades is None:
+                    trade_state, new_trades = None, trades
+
+                trade_state = self.fold_trades(trade_state, new_trades)
+                logger.debug(f"Folded {len(new_trades)} new fills of {symbol} into trade state: {trade_state}")
+                self.trade_states[symbol] = trade_state
+                return trade_state
 
             except ccxt.NetworkError as e:
-                logger.error(f"Network error while fetching ticker: {e}")
-                time.sleep(3)
+                logger.error(f"Network error while fetching trades: {e}")
+                sleep_backoff(retries, e)
                 retries += 1
 
             except ccxt.ExchangeError as e:
-                logger.error(f"Exchange error while fetching ticker: {e}")
+                logger.error(f"Exchange error while fetching trades: {e}")
                 raise e
 
             except Exception as e:
                 logger.error(f"An unexpected error occurred: {e}")
                 raise e
 
-    def get_trade_value_usd(self, trades: List[Dict]) -> float:
+    def trades_after_checkpoint(self, trade_state: Union[Dict, None], trades: List[Dict]) -> Union[List[Dict], None]:
         """
-        Calculate proportion of original purchase value of trade in USD that is still owned.
+        Get the fills newer than the checkpoint of the trade totals.
 
         Args:
-            trades: A list of order fills for a trade.
+            trade_state: Totals of the most recent trade, or None if there are none yet.
+            trades: A list of order fills ordered from oldest to newest.
 
         Returns:
-            float: Original purchase price of trade in USD that is still owned.
+            List[Dict]: Fills after the checkpoint, or None if they can't be told apart from the fills already folded.
         """
-        trade_value_usd = 0
-        amount_owned = 0
-        amount_bought = 0
+        if trade_state is None:
+            return None
+
+        trade_ids = [trade.get("id") for trade in trades]
+        if trade_state["last_trade_id"] in trade_ids:
+            return trades[trade_ids.index(trade_state["last_trade_id"]) + 1:]
+        if all((trade.get("timestamp") or 0) <= trade_state["timestamp"] for trade in trades):
+            # Checkpoint fill is no longer returned by the exchange, but nothing happened since
+            return []
+        return None
+
+    def fold_new_trades(self, symbol: str, trades: List[Dict]) -> bool:
+        """
+        Fold fills pushed by the account stream into the trade totals of given symbol.
+
+        Fills up to the checkpoint of the totals have already been folded and are skipped.
+
+        Args:
+            symbol: Uppercase string literal name of a pair of traded currencies
+            trades: A list of order fills ordered from oldest to newest.
+
+        Returns:
+            bool: True if the fills were folded, False if there are no totals of the symbol to fold them into.
+        """
+        if symbol not in self.trade_states:
+            return False
+
+        trade_state = self.trade_states[symbol]
+        if trade_state is not None:
+            trades = [
+                trade for trade in trades
+                if trade.get("id") != trade_state["last_trade_id"] and (trade.get("timestamp") or 0) >= trade_state["timestamp"]
+            ]
+        self.trade_states[symbol] = self.fold_trades(trade_state, trades)
+        return True
+
+    def fold_trades(self, trade_state: Union[Dict, None], trades: List[Dict]) -> Union[Dict, None]:
+        """
+        Fold order fills into the running totals of the most recent trade.
+
+        A buy following a sell starts a new trade and resets the totals.
+
+        Args:
+            trade_state: Totals of the most recent trade, or None to start from scratch.
+            trades: A list of order fills ordered from oldest to newest.
+
+        Returns:
+            Dict: New totals, leaving the given ones untouched, or None if there were no totals and no fills.
+        """
+        if trade_state is not None:
+            trade_state = dict(trade_state)
 
         for trade in trades:
+            side = trade.get("side")
+            if trade_state is None or (trade_state["side"] == "sell" and side == "buy"):
+                trade_state = {"amount_bought": 0, "amount_owned": 0, "cost": 0}
+
             amount = trade.get("amount", 0)
-            if trade.get("side") == "buy":
-                amount_owned += amount
-                amount_bought += amount
-                trade_value_usd += trade.get("cost", 0)
-            elif trade.get("side") == "sell":
-                amount_owned -= amount
+            sign = SIDE_SIGNS.get(side, 0)
+            trade_state["amount_owned"] += sign * amount
+            if sign > 0:
+                trade_state["amount_bought"] += amount
+                trade_state["cost"] += trade.get("cost", 0)
 
+            trade_state["side"] = side
+            trade_state["last_trade_id"] = trade.get("id")
+            trade_state["timestamp"] = trade.get("timestamp") or 0
+
+        return trade_state
+
+    def get_value_owned_usd(self, trade_value_usd: float, amount_bought: float, amount_owned: float) -> float:
+        """
+        Calculate the part of the original purchase value of a trade in USD that is still owned.
+
+        Args:
+            trade_value_usd: Original purchase value of the trade in USD.
+            amount_bought: Amount of currency bought in the trade.
+            amount_owned: Amount of currency bought in the trade that is still owned.
+
+        Returns:
+            float: Original purchase price of trade in USD that is still owned.
+        """
         if amount_bought == 0:
             return 0
 
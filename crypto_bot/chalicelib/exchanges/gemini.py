@@ -8,7 +8,12 @@ from chalicelib import utils, trade_processing
 
 logger = logging.getLogger("app")
 
+MARKETS_TTL_SECONDS = 3_600
+
 class GeminiClient:
+    # Gemini requires strictly increasing nonces per API key, so private calls must not overlap
+    concurrent_orders = False
+
     def __init__(self, base_currency: str):
         """
         Initialization with the base currency.
@@ -17,6 +22,7 @@ class GeminiClient:
             base_currency: Currency used for trading and for the calculation of available funds, e.g., USD or USDT.
         """
         self.client = None
+        self.markets_loaded_at = None
 
         if not base_currency:
             raise ValueError("base currency not set")
@@ -38,6 +44,13 @@ class GeminiClient:
         retries = 0
         while retries < max_retries:
             try:
+                # Reuse the connection of a warm container, only refreshing stale markets
+                if self.client is not None:
+                    if time.monotonic() - self.markets_loaded_at > MARKETS_TTL_SECONDS:
+                        self.client.load_markets(reload=True)
+                        self.markets_loaded_at = time.monotonic()
+                    return True
+
                 api_key_manager = utils.APIKeyManager(secret_name)
                 api_key = api_key_manager.get_api_key()
                 api_secret = api_key_manager.get_api_secret()
@@ -53,6 +66,7 @@ class GeminiClient:
                 exchange.load_markets()
 
                 self.client = exchange
+                self.markets_loaded_at = time.monotonic()
                 return True
             
             except ccxt.NetworkError as e:
@@ -329,12 +343,9 @@ class GeminiClient:
                     prev_trade_side = None
                     for i, trade in enumerate(reversed(trades)):
                         side = trade.get("side")
-                        if (prev_trade_side == "buy") & (side == "sell"):
+                        if prev_trade_side == "buy" and side == "sell":
                             return trades[-i:]
-                        elif side == "buy":
-                            prev_trade_side = "buy"
-                        elif side == "sell":
-                            prev_trade_side = "sell"
+                        prev_trade_side = side
                     else:
                         return trades
                 else:
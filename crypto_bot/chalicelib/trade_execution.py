@@ -1,11 +1,14 @@
 import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
 from decimal import Decimal, ROUND_HALF_UP
 from chalicelib.exchanges import gemini, binance, binance_usdm, bybit
 from chalicelib import utils
 
+MAX_ORDER_WORKERS = 8
+
 class Exchange:
-    def __init__(self, exchange_name: str, base_currency: str):
+    def __init__(self, exchange_name: str, base_currency: str, state_table_name: str=None):
         if exchange_name == "gemini":
             self.client = gemini.GeminiClient(base_currency)
         elif exchange_name == "binance":
@@ -13,10 +16,14 @@ class Exchange:
         elif exchange_name == "binance_usdm":
             self.client = binance_usdm.BinanceUsdmClient(base_currency)
         elif exchange_name == "bybit":
-            self.client = bybit.BybitClient(base_currency)
+            self.client = bybit.BybitClient(base_currency, state_table_name=state_table_name)
+
+        self.concurrent_orders = self.client.concurrent_orders
 
-    def connect(self, secret_name, sandbox=False, max_retries=3):
-        self.client.connect(secret_name, sandbox, max_retries)
+    def connect(self, secret_name, sandbox=False, max_retries=None):
+        if max_retries is None:
+            return self.client.connect(secret_name, sandbox)
+        return self.client.connect(secret_name, sandbox, max_retries)
 
     def create_limit_order(self, symbol: str, side: str, amount: float, order_price: float):
         return self.client.create_limit_order(symbol, side, amount, order_price)
@@ -149,7 +156,7 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
 
     orders = []
     if sell_signals:
-        for trade in sell_signals:
+        def place_order(trade):
             symbol = trade.get("symbol")
             currency = trade.get("currency")
             order_action = trade.get("order_action")
@@ -159,9 +166,9 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
 
             sell_amount = exchange.get_total_currency(currency)
             order_price = last_price - (last_price * price_adjustment)
-            order = exchange.create_limit_order(symbol, order_action, sell_amount, order_price)
+            return exchange.create_limit_order(symbol, order_action, sell_amount, order_price)
 
-            orders.append(order)
+        orders += place_orders(place_order, sell_signals, exchange.concurrent_orders)
 
     if buy_signals:
         account_allocation_dict = exchange.get_account_allocation()
@@ -190,7 +197,7 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
         if current_trade_symbols:
             # Partially allocated account and trade precedence symbol stays in current trades
             if (trade_precedence_symbol in current_trade_symbols) & (incoming_trades_pct <= available_usd_pct):
-                for trade in buy_signals:
+                def place_order(trade):
                     symbol = trade.get("symbol")
                     currency = trade.get("currency")
                     order_action = trade.get("order_action")
@@ -202,9 +209,9 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                     allocated_usd = total_account_value_usd * percentage
                     order_price = last_price + (last_price * price_adjustment)
                     position_size = allocated_usd / order_price
-                    order = exchange.create_limit_order(symbol, order_action, position_size, order_price)
+                    return exchange.create_limit_order(symbol, order_action, position_size, order_price)
 
-                    orders.append(order)
+                orders += place_orders(place_order, buy_signals, exchange.concurrent_orders)
 
             # Sell from symbol with trade precedence to make room for incoming trades
             elif (trade_precedence_symbol in current_trade_symbols) & (incoming_trades_pct > available_usd_pct):
@@ -232,7 +239,7 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                 account_allocation_dict = exchange.get_account_allocation()
                 total_account_value_usd = Decimal(str(sum(account_allocation_dict.values()) ))
 
-                for trade in buy_signals:
+                def place_order(trade):
                     symbol = trade.get("symbol")
                     currency = trade.get("currency")
                     order_action = trade.get("order_action")
@@ -244,13 +251,13 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                     allocated_usd = total_account_value_usd * percentage
                     order_price = last_price + (last_price * price_adjustment)
                     position_size = allocated_usd / order_price
-                    order = exchange.create_limit_order(symbol, order_action, position_size, order_price)
+                    return exchange.create_limit_order(symbol, order_action, position_size, order_price)
 
-                    orders.append(order)
+                orders += place_orders(place_order, buy_signals, exchange.concurrent_orders)
 
             # No selling required
             elif (trade_precedence_symbol in incoming_trade_symbols) & (incoming_trades_pct + available_pct + unallocated_pct <= available_usd_pct):
-                for trade in buy_signals:
+                def place_order(trade):
                     symbol = trade.get("symbol")
                     currency = trade.get("currency")
                     order_action = trade.get("order_action")
@@ -265,9 +272,9 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                     allocated_usd = total_account_value_usd * percentage
                     order_price = last_price + (last_price * price_adjustment)
                     position_size = allocated_usd / order_price
-                    order = exchange.create_limit_order(symbol, order_action, position_size, order_price)
+                    return exchange.create_limit_order(symbol, order_action, position_size, order_price)
 
-                    orders.append(order)
+                orders += place_orders(place_order, buy_signals, exchange.concurrent_orders)
 
             # Sell from current trades symbol with trade precedence to make room for incoming trades
             elif (trade_precedence_symbol in incoming_trade_symbols) & (incoming_trades_pct + available_pct + unallocated_pct > available_usd_pct):
@@ -297,7 +304,7 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                 account_allocation_dict = exchange.get_account_allocation()
                 total_account_value_usd = Decimal(str(sum(account_allocation_dict.values())))
 
-                for trade in buy_signals:
+                def place_order(trade):
                     symbol = trade.get("symbol")
                     currency = trade.get("currency")
                     order_action = trade.get("order_action")
@@ -313,13 +320,13 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                     allocated_usd = total_account_value_usd * percentage
                     order_price = last_price + (last_price * price_adjustment)
                     position_size = allocated_usd / order_price
-                    order = exchange.create_limit_order(symbol, order_action, position_size, order_price)
+                    return exchange.create_limit_order(symbol, order_action, position_size, order_price)
 
-                    orders.append(order)
+                orders += place_orders(place_order, buy_signals, exchange.concurrent_orders)
 
         # If no active trades, use full account value for incoming trades, prioritizing the symbol with trade precedence.
         elif not current_trade_symbols:
-            for trade in buy_signals:
+            def place_order(trade):
                 symbol = trade.get("symbol")
                 currency = trade.get("currency")
                 order_action = trade.get("order_action")
@@ -334,12 +341,30 @@ def buy_side_boost(exchange: Exchange, trades: List[dict], increment_pct: float=
                 allocated_usd = total_usd * percentage
                 order_price = last_price + (last_price * price_adjustment)
                 position_size = allocated_usd / order_price
-                order = exchange.create_limit_order(symbol, order_action, position_size, order_price)
+                return exchange.create_limit_order(symbol, order_action, position_size, order_price)
 
-                orders.append(order)
+            orders += place_orders(place_order, buy_signals, exchange.concurrent_orders)
 
     return orders
 
+def place_orders(place_order: Callable[[dict], dict], trades: List[dict], concurrent: bool=True) -> List:
+    """
+    Places the orders of multiple trades, concurrently if the exchange allows overlapping private calls.
+
+    Args:
+        place_order: Function that places the order for a single trade and returns it.
+        trades (List[dict]): A list of trades.
+        concurrent (optional): Places the orders on a thread pool, otherwise one after another. Defaults to True.
+
+    Returns:
+        List of orders placed on the exchange, in the same order as trades.
+    """
+    if not concurrent:
+        return [place_order(trade) for trade in trades]
+
+    with ThreadPoolExecutor(max_workers=MAX_ORDER_WORKERS) as executor:
+        return list(executor.map(place_order, trades))
+
 def wait_till_sell_order_fill(exchange: Exchange, currency: str, amount: Decimal, wait_seconds: int=15, max_attempts: int=3) -> bool:
     """
     Waits for a sell order to be filled.
@@ -97,7 +97,7 @@ def get_active_strategy_configs(threshold: float=0) -> List:
     ]
     return config_dicts
 
-def get_ticker_recent_signals(ticker: str, cutoff_time: datetime, table_name: str) -> List:
+def get_ticker_recent_signals(ticker: str, cutoff_time: datetime, table_name: str, table=None) -> List:
     """
     Retrieves trade signals for a given ticker that are newer than cutoff_time.
 
@@ -105,14 +105,16 @@ def get_ticker_recent_signals(ticker: str, cutoff_time: datetime, table_name: st
         ticker: Symbol representing a market on TradingView.
         cutoff_time: Filters trade signals by their create_ts >= cutoff_time.
         table_name: Name of DynamoDB table that stores trade signals
+        table (optional): DynamoDB table resource of table_name, reused instead of creating a new one.
 
     Returns:
         List of JSON objects containing trades that meet the criteria.  If no 
         trades meet criteria returns an empty list.
     """
     try:
-        dynamodb_manager = utils.DynamoDBManager()
-        table = dynamodb_manager.get_table(table_name)
+        if table is None:
+            dynamodb_manager = utils.DynamoDBManager()
+            table = dynamodb_manager.get_table(table_name)
         response = table.query(
             KeyConditionExpression="#ticker = :ticker AND #create_ts >= :cutoff_time",
             ExpressionAttributeNames={
@@ -132,22 +134,25 @@ def get_ticker_recent_signals(ticker: str, cutoff_time: datetime, table_name: st
     except Exception as e:
         raise RuntimeError(f"An unexpected error occured: {e}")
     
-def get_all_recent_signals(cutoff_time: datetime, table_name: str) -> List:
+def get_all_recent_signals(cutoff_time: datetime, table_name: str, table=None) -> List:
     """
     Get all recent trade signals for active strategies newer than the cutoff time.
 
     Args:
         cutoff_time: The cutoff time for retrieving recent signals.
         table_name: The name of the table where recent signals are stored.
+        table (optional): Table resource of table_name, shared by the queries of all tickers.
 
     Returns:
         list: List of recent trade signals for active strategies.
     """
     try:
         active_tickers = get_active_strategy_tickers()
+        if table is None:
+            table = utils.DynamoDBManager().get_table(table_name)
         trade_signals = []
         for ticker in active_tickers:
-            trade_signals += get_ticker_recent_signals(ticker, cutoff_time, table_name)
+            trade_signals += get_ticker_recent_signals(ticker, cutoff_time, table_name, table)
         return trade_signals
     except Exception as e:
         print(f"Error in retrieving recent signals: {e}")
@@ -118,6 +118,26 @@ class DynamoDBManager:
                 ) from e
             else:
                 raise e
+
+def batch_write_items(table, items: List[dict], batch_size: int=25, key_names: tuple=("ticker", "create_ts")):
+    """
+    Writes items to a DynamoDB table with BatchWriteItem.
+
+    Items are split into chunks of at most 25, the BatchWriteItem limit, and
+    each chunk is flushed by boto3's batch writer which also resends any
+    unprocessed items. Items with the same key within a chunk are deduplicated,
+    keeping the last one like consecutive put_item calls would.
+
+    Args:
+        table: DynamoDB table resource object.
+        items: Items to write to the table.
+        batch_size (optional): Maximum number of items per request. Defaults to 25.
+        key_names (optional): Names of the table's primary key attributes. Defaults to ticker and create_ts.
+    """
+    for i in range(0, len(items), batch_size):
+        with table.batch_writer(overwrite_by_pkeys=list(key_names)) as batch:
+            for item in items[i:i + batch_size]:
+                batch.put_item(Item=item)
             
 def get_env_var(name: str, default_value: bool | None = None) -> bool:
     """Gets environment variable and returns as boolean."""
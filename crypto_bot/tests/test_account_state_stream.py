@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+import account_state_stream
+
+class StopStream(Exception):
+    pass
+
+async def wait_forever(*args, **kwargs):
+    await asyncio.Event().wait()
+
+@pytest.fixture
+def mock_client():
+    with patch("account_state_stream.BybitClient") as mock_client_class:
+        client = mock_client_class.return_value
+        client.base_currency = "USDT"
+        client.connect.return_value = True
+        client.get_account_allocation.return_value = {"USD": 1000}
+        client.get_allocation_from_trade_states.return_value = {"USD": 900}
+        yield client
+
+@pytest.fixture
+def mock_stream():
+    with patch("account_state_stream.utils.APIKeyManager"), patch("account_state_stream.ccxt.pro.bybit") as mock_stream_class:
+        stream = mock_stream_class.return_value
+        stream.watch_balance = wait_forever
+        stream.watch_my_trades = wait_forever
+        stream.close = AsyncMock()
+        yield stream
+
+@pytest.fixture(autouse=True)
+def mock_active_configs():
+    configs = [{"symbol": "ETH/USDT", "currency": "ETH", "percentage": 0.25}]
+    with patch("account_state_stream.trade_processing.get_active_strategy_configs", return_value=configs):
+        yield configs
+
+def test_stream_account_state_applies_pushed_updates(mock_client, mock_stream, mock_active_configs):
+    fill = {'id': '4', 'timestamp': 4, 'symbol': 'ETH/USDT', 'side': 'sell', 'price': 3679.36, 'cost': 1200, 'amount': 0.55}
+    balances = iter([{"free": {"USDT": 900}}])
+    trades = iter([[fill]])
+
+    async def watch_balance():
+        try:
+            return next(balances)
+        except StopIteration:
+            await asyncio.sleep(0.01)
+            raise StopStream()
+
+    async def watch_my_trades():
+        try:
+            return next(trades)
+        except StopIteration:
+            await wait_forever()
+
+    mock_stream.watch_balance = watch_balance
+    mock_stream.watch_my_trades = watch_my_trades
+
+    with pytest.raises(StopStream):
+        asyncio.run(account_state_stream.stream_account_state("secret", "USDT", "state"))
+
+    # REST only seeds the state, updates are taken from the streams
+    mock_client.get_account_allocation.assert_called_once_with(use_snapshot=False)
+    mock_client.fold_new_trades.assert_called_once_with("ETH/USDT", [fill])
+    mock_client.get_allocation_from_trade_states.assert_called_with(900, mock_active_configs)
+    assert mock_client.save_allocation_snapshot.call_count == 3
+    mock_stream.close.assert_awaited_once()
+
+def test_stream_account_state_refreshes_without_updates(mock_client, mock_stream):
+    mock_client.save_allocation_snapshot.side_effect = [None, None, StopStream()]
+
+    with patch.object(account_state_stream, "SNAPSHOT_REFRESH_SECONDS", 0.01):
+        with pytest.raises(StopStream):
+            asyncio.run(account_state_stream.stream_account_state("secret", "USDT", "state"))
+
+    mock_client.get_account_allocation.assert_called_once_with(use_snapshot=False)
+    mock_client.get_allocation_from_trade_states.assert_called_with(1000, [{"symbol": "ETH/USDT", "currency": "ETH", "percentage": 0.25}])
+    mock_stream.close.assert_awaited_once()
+
+def test_stream_account_state_resyncs_after_stream_error(mock_client, mock_stream):
+    mock_stream.watch_balance = AsyncMock(side_effect=[
+        account_state_stream.ccxt.NetworkError("connection refused"),
+        account_state_stream.ccxt.NetworkError("connection refused"),
+        {"free": {"USDT": 900}},
+        StopStream(),
+    ])
+
+    with patch.object(account_state_stream, "backoff_delay", return_value=0) as mock_backoff_delay:
+        with pytest.raises(StopStream):
+            asyncio.run(account_state_stream.stream_account_state("secret", "USDT", "state"))
+
+    assert [call.args[0] for call in mock_backoff_delay.call_args_list] == [0, 1]
+    # Updates may have been missed while disconnected, so the state is fetched via REST again
+    assert mock_client.get_account_allocation.call_count == 2
+    mock_client.get_allocation_from_trade_states.assert_not_called()
@@ -0,0 +1,311 @@
+import pytest
+import orjson
+from unittest.mock import MagicMock, patch
+from decimal import Decimal
+from chalicelib.exchanges import bybit
+from chalicelib.exchanges.bybit import BybitClient
+
+@pytest.fixture(autouse=True)
+def clear_markets_cache():
+    BybitClient.markets_cache.clear()
+
+def test_sleep_backoff():
+    with patch.object(bybit.time, "sleep") as mock_sleep:
+        bybit.sleep_backoff(0)
+        bybit.sleep_backoff(10)
+
+    first_delay, capped_delay = [call.args[0] for call in mock_sleep.call_args_list]
+    assert bybit.BACKOFF_BASE_SECONDS <= first_delay <= 2 * bybit.BACKOFF_BASE_SECONDS
+    assert capped_delay == bybit.BACKOFF_MAX_SECONDS
+
+def test_sleep_backoff_rate_limited():
+    with patch.object(bybit.time, "sleep") as mock_sleep:
+        bybit.sleep_backoff(0, bybit.ccxt.RateLimitExceeded("bybit {\"retCode\":10006,\"retMsg\":\"Too many visits!\"}"))
+        bybit.sleep_backoff(0, bybit.ccxt.RequestTimeout("bybit GET https://api.bybit.com/v5/market/tickers"))
+
+    rate_limited_delay, network_delay = [call.args[0] for call in mock_sleep.call_args_list]
+    assert rate_limited_delay >= bybit.RATE_LIMIT_BACKOFF_BASE_SECONDS
+    assert network_delay <= 2 * bybit.BACKOFF_BASE_SECONDS
+
+def test_connect_reuses_client_while_markets_fresh():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    exchange.markets = {"BTC/USDT": {}}
+    exchange.markets_loaded_at = bybit.time.monotonic()
+
+    with patch("chalicelib.utils.APIKeyManager") as mock_key_manager:
+        assert exchange.connect("secret") is True
+
+    mock_key_manager.assert_not_called()
+    exchange.client.load_markets.assert_not_called()
+
+def test_connect_reloads_stale_markets(tmp_path):
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    exchange.client.load_markets.return_value = {"ETH/USDT": {}}
+    exchange.markets = {"BTC/USDT": {}}
+    exchange.markets_loaded_at = bybit.time.monotonic() - bybit.MARKETS_TTL_SECONDS - 1
+
+    with patch.object(bybit, "MARKETS_CACHE_DIR", str(tmp_path)):
+        assert exchange.connect("secret") is True
+
+    exchange.client.load_markets.assert_called_once_with(reload=True)
+    assert exchange.markets == {"ETH/USDT": {}}
+
+def test_connect_sets_keep_alive_headers(tmp_path):
+    exchange = BybitClient("USDT")
+
+    with patch("chalicelib.utils.APIKeyManager"), patch.object(bybit, "MARKETS_CACHE_DIR", str(tmp_path)), \
+            patch.object(bybit.ccxt.bybit, "load_markets", return_value={}):
+        assert exchange.connect("secret") is True
+
+    assert exchange.client.headers.get("Connection") == "keep-alive"
+
+def test_load_markets_uses_disk_cache(tmp_path):
+    markets = {"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT", "base": "BTC", "quote": "USDT", "spot": True}}
+    fetched = bybit.ccxt.bybit()
+    fetched.markets = markets
+    fetched.currencies = {}
+
+    with patch.object(bybit, "MARKETS_CACHE_DIR", str(tmp_path)):
+        with patch.object(fetched, "load_markets", return_value=markets) as mock_load_markets:
+            BybitClient("USDT").load_markets(fetched)
+        mock_load_markets.assert_called_once()
+
+        # New container, markets are only cached on disk
+        BybitClient.markets_cache.clear()
+        cached = bybit.ccxt.bybit()
+        with patch.object(cached, "fetch_markets") as mock_fetch_markets:
+            exchange = BybitClient("USDT")
+            exchange.load_markets(cached)
+        mock_fetch_markets.assert_not_called()
+
+    assert "BTC/USDT" in exchange.markets
+    assert cached.markets_by_id["BTCUSDT"][0]["symbol"] == "BTC/USDT"
+    assert not exchange.markets_expired()
+
+def test_load_markets_shared_between_clients(tmp_path):
+    markets = {"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT", "base": "BTC", "quote": "USDT", "spot": True}}
+    first = bybit.ccxt.bybit()
+    second = bybit.ccxt.bybit()
+
+    with patch.object(bybit, "MARKETS_CACHE_DIR", str(tmp_path)):
+        with patch.object(first, "fetch_markets", return_value=list(markets.values())), patch.object(first, "fetch_currencies", return_value={}):
+            BybitClient("USDT").load_markets(first)
+        with patch.object(second, "fetch_markets") as mock_fetch_markets:
+            client = BybitClient("USDT")
+            client.load_markets(second)
+
+    mock_fetch_markets.assert_not_called()
+    assert second.markets is first.markets
+    assert second.markets_by_id is first.markets_by_id
+    assert client.markets is first.markets
+    assert not client.markets_expired()
+
+def test_get_account_allocation():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    exchange.client.fetch_balance.return_value = {"free": {"USDT": 1000}}
+    trades_by_symbol = {
+        "BTC/USDT": [{'symbol': 'BTC/USDT', 'side': 'buy', 'price': 60000, 'cost': 600, 'amount': 0.01}],
+        "ETH/USDT": [],
+    }
+    exchange.client.fetch_my_trades.side_effect = lambda symbol, *args, **kwargs: trades_by_symbol[symbol]
+    configs = [
+        {"symbol": "BTC/USDT", "currency": "BTC", "percentage": 0.2},
+        {"symbol": "ETH/USDT", "currency": "ETH", "percentage": 0.25},
+    ]
+
+    with patch("chalicelib.trade_processing.get_active_strategy_configs", return_value=configs):
+        result = exchange.get_account_allocation()
+
+    assert result == {"USD": 1000, "BTC": 600, "ETH": 0}
+
+def test_get_account_allocation_from_snapshot():
+    exchange = BybitClient("USDT", state_table_name="state")
+    exchange.client = MagicMock()
+    exchange.dynamodb_manager = MagicMock()
+    table = exchange.dynamodb_manager.get_table.return_value
+    allocation = {"USD": Decimal("1000"), "BTC": Decimal("600")}
+    table.get_item.return_value = {"Item": {"exchange": "bybit:live:USDT", "allocation": allocation, "updated_at": Decimal(str(bybit.time.time()))}}
+
+    assert exchange.get_account_allocation() == allocation
+    table.get_item.assert_called_once_with(Key={"exchange": "bybit:live:USDT"})
+    exchange.client.fetch_balance.assert_not_called()
+
+def test_save_allocation_snapshot_keyed_by_environment():
+    exchange = BybitClient("USDT", state_table_name="state")
+    exchange.sandbox = True
+    exchange.dynamodb_manager = MagicMock()
+    table = exchange.dynamodb_manager.get_table.return_value
+
+    exchange.save_allocation_snapshot({"USD": 1000.5})
+
+    item = table.put_item.call_args.kwargs["Item"]
+    assert item["exchange"] == "bybit:sandbox:USDT"
+    assert item["allocation"] == {"USD": Decimal("1000.5")}
+
+def test_get_allocation_snapshot_ignored_when_stale():
+    exchange = BybitClient("USDT", state_table_name="state")
+    exchange.dynamodb_manager = MagicMock()
+    table = exchange.dynamodb_manager.get_table.return_value
+    updated_at = bybit.time.time()
+    table.get_item.return_value = {"Item": {"exchange": "bybit:live:USDT", "allocation": {"USD": Decimal("1000")}, "updated_at": Decimal(str(updated_at))}}
+
+    exchange.last_order_at = updated_at + 1
+    assert exchange.get_allocation_snapshot() is None
+
+    exchange.last_order_at = 0
+    table.get_item.return_value["Item"]["updated_at"] = Decimal(str(updated_at - bybit.ALLOCATION_SNAPSHOT_MAX_AGE_SECONDS - 1))
+    assert exchange.get_allocation_snapshot() is None
+
+def test_create_limit_order_retries_with_same_order_link_id():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    exchange.client.create_limit_order.side_effect = [
+        bybit.ccxt.RequestTimeout("bybit POST https://api.bybit.com/v5/order/create"),
+        bybit.ccxt.InvalidOrder('bybit {"retCode":170141,"retMsg":"Duplicate clientOrderId.","result":{}}'),
+    ]
+
+    with patch.object(bybit, "sleep_backoff"):
+        order = exchange.create_limit_order("BTC/USDT", "buy", 0.01, 60000)
+
+    first_call, retry_call = exchange.client.create_limit_order.call_args_list
+    order_link_id = first_call.kwargs["params"]["clientOrderId"]
+    assert retry_call.kwargs["params"]["clientOrderId"] == order_link_id
+    assert order["clientOrderId"] == order_link_id
+    exchange.client.fetch_open_orders.assert_not_called()
+
+def test_get_total_usd():
+    exchange = BybitClient("USDT")
+    allocation = {"USD": 1000.5, "BTC": Decimal("600.25"), "ETH": 0}
+
+    with patch.object(BybitClient, "get_account_allocation", return_value=allocation):
+        result = exchange.get_total_usd()
+
+    assert result == Decimal("1600.75")
+
+def test_get_bid_ask():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock(spec=bybit.ccxt.Exchange)
+    exchange.client.fetch_ticker.return_value = {"bid": 0.1, "ask": Decimal("0.2"), "last": None}
+
+    bid, ask = exchange.get_bid_ask("BTC/USDT")
+
+    assert bid == Decimal("0.1")
+    assert ask == Decimal("0.2")
+    assert exchange.get_last_price("BTC/USDT") is None
+    exchange.client.fetch_ticker.assert_called_once_with("BTC/USDT")
+
+def test_fetch_ticker_refetches_after_ttl():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    exchange.tickers["BTC/USDT"] = (bybit.time.monotonic() - bybit.TICKER_TTL_SECONDS, {"last": 1})
+    exchange.client.fetch_ticker.return_value = {"last": 2}
+
+    assert exchange.fetch_ticker("BTC/USDT") == {"last": 2}
+    exchange.client.fetch_ticker.assert_called_once_with("BTC/USDT")
+
+def test_get_trade_state_folds_new_fills():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    fills = [
+        {'id': '1', 'timestamp': 1, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3359.31, 'cost': 500, 'amount': 0.156192},
+        {'id': '2', 'timestamp': 2, 'symbol': 'ETH/USDT', 'side': 'sell', 'price': 3679.36, 'cost': 500, 'amount': 0.156192},
+        {'id': '3', 'timestamp': 3, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3359.31, 'cost': 2000, 'amount': 1.15},
+        {'id': '4', 'timestamp': 4, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3359.31, 'cost': 200, 'amount': 0.115},
+        {'id': '5', 'timestamp': 5, 'symbol': 'ETH/USDT', 'side': 'sell', 'price': 3679.36, 'cost': 1200, 'amount': 0.55},
+    ]
+    exchange.client.fetch_my_trades.side_effect = [fills[:3], fills[1:], fills[4:], []]
+
+    first_state = exchange.get_trade_state('ETH/USDT')
+    assert first_state == {"amount_bought": 1.15, "amount_owned": 1.15, "cost": 2000, "side": "buy", "last_trade_id": "3", "timestamp": 3}
+
+    # Fills up to the checkpoint are skipped, later fills are folded in
+    trade_state = exchange.get_trade_state('ETH/USDT')
+    assert trade_state["amount_bought"] == pytest.approx(1.265)
+    assert trade_state["amount_owned"] == pytest.approx(0.715)
+    assert trade_state["cost"] == 2200
+    assert (trade_state["side"], trade_state["last_trade_id"], trade_state["timestamp"]) == ("sell", "5", 5)
+    assert exchange.get_value_owned_usd(trade_state["cost"], trade_state["amount_bought"], trade_state["amount_owned"]) == pytest.approx(1254)
+    assert first_state["last_trade_id"] == "3"
+
+    # Checkpoint still returned without new fills or aged out of the window
+    expected_state = dict(trade_state)
+    assert exchange.get_trade_state('ETH/USDT') == expected_state
+    assert exchange.get_trade_state('ETH/USDT') == expected_state
+
+def test_get_trade_state_fetches_fills_since_checkpoint():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    checkpoint_ts = int(bybit.time.time() * 1000) - 60_000
+    exchange.trade_states['ETH/USDT'] = {"amount_bought": 1.15, "amount_owned": 1.15, "cost": 2000, "side": "buy", "last_trade_id": "3", "timestamp": checkpoint_ts}
+    exchange.client.fetch_my_trades.return_value = [
+        {'id': '3', 'timestamp': checkpoint_ts, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3359.31, 'cost': 2000, 'amount': 1.15},
+        {'id': '4', 'timestamp': checkpoint_ts + 1, 'symbol': 'ETH/USDT', 'side': 'sell', 'price': 3679.36, 'cost': 1200, 'amount': 0.55},
+    ]
+
+    trade_state = exchange.get_trade_state('ETH/USDT')
+
+    exchange.client.fetch_my_trades.assert_called_once_with('ETH/USDT', since=checkpoint_ts, limit=bybit.TRADES_LIMIT)
+    assert (trade_state["amount_bought"], trade_state["cost"], trade_state["last_trade_id"]) == (1.15, 2000, "4")
+    assert trade_state["amount_owned"] == pytest.approx(0.6)
+
+def test_get_trade_state_falls_back_to_latest_fills():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    checkpoint_ts = int(bybit.time.time() * 1000) - 60_000
+    exchange.trade_states['ETH/USDT'] = {"amount_bought": 5, "amount_owned": 5, "cost": 9000, "side": "buy", "last_trade_id": "0", "timestamp": checkpoint_ts}
+    latest_fills = [
+        {'id': str(i), 'timestamp': checkpoint_ts + i, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3000, 'cost': 30, 'amount': 0.01}
+        for i in range(1, bybit.TRADES_LIMIT + 1)
+    ]
+    exchange.client.fetch_my_trades.return_value = latest_fills
+
+    trade_state = exchange.get_trade_state('ETH/USDT')
+
+    # More fills than fit a page since the checkpoint, totals are rebuilt from the latest fills
+    assert exchange.client.fetch_my_trades.call_args_list[-1].kwargs == {"limit": bybit.TRADES_LIMIT}
+    assert trade_state["cost"] == pytest.approx(30 * bybit.TRADES_LIMIT)
+    assert trade_state["last_trade_id"] == str(bybit.TRADES_LIMIT)
+
+def test_get_trade_state_rebuilds_without_checkpoint_match():
+    exchange = BybitClient("USDT")
+    exchange.client = MagicMock()
+    exchange.trade_states['ETH/USDT'] = {"amount_bought": 5, "amount_owned": 5, "cost": 9000, "side": "buy", "last_trade_id": "0", "timestamp": 0}
+    exchange.client.fetch_my_trades.return_value = [
+        {'id': '8', 'timestamp': 8, 'symbol': 'ETH/USDT', 'side': 'sell', 'price': 3679.36, 'cost': 500, 'amount': 0.156192},
+        {'id': '9', 'timestamp': 9, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3359.31, 'cost': 2000, 'amount': 1.15},
+    ]
+
+    trade_state = exchange.get_trade_state('ETH/USDT')
+
+    assert (trade_state["amount_bought"], trade_state["amount_owned"], trade_state["cost"]) == (1.15, 1.15, 2000)
+
+def test_fold_new_trades_skips_folded_fills():
+    exchange = BybitClient("USDT")
+    exchange.trade_states['ETH/USDT'] = {"amount_bought": 1.15, "amount_owned": 1.15, "cost": 2000, "side": "buy", "last_trade_id": "3", "timestamp": 3}
+    fills = [
+        {'id': '3', 'timestamp': 3, 'symbol': 'ETH/USDT', 'side': 'buy', 'price': 3359.31, 'cost': 2000, 'amount': 1.15},
+        {'id': '4', 'timestamp': 4, 'symbol': 'ETH/USDT', 'side': 'sell', 'price': 3679.36, 'cost': 1200, 'amount': 0.55},
+    ]
+
+    assert exchange.fold_new_trades('ETH/USDT', fills) is True
+    assert exchange.trade_states['ETH/USDT']["amount_owned"] == pytest.approx(0.6)
+    assert exchange.trade_states['ETH/USDT']["last_trade_id"] == "4"
+
+    # Symbols without totals can't be updated from single fills
+    assert exchange.fold_new_trades('BTC/USDT', fills) is False
+    assert 'BTC/USDT' not in exchange.trade_states
+
+def test_connect_parses_json_with_orjson(tmp_path):
+    exchange = BybitClient("USDT")
+
+    with patch("chalicelib.utils.APIKeyManager"), patch.object(bybit, "MARKETS_CACHE_DIR", str(tmp_path)), \
+            patch.object(bybit.ccxt.bybit, "load_markets", return_value={}):
+        assert exchange.connect("secret") is True
+
+    assert exchange.client.on_json_response is orjson.loads
+    assert exchange.client.quoteJsonNumbers is False
+    response = exchange.client.parse_json('{"retCode": 0, "result": {"bid1Price": "0.1234"}}')
+    assert response == {"retCode": 0, "result": {"bid1Price": "0.1234"}}
@@ -1,6 +1,8 @@
 import pytest
+import time
 from unittest.mock import MagicMock, patch
 from decimal import Decimal
+from chalicelib.exchanges import gemini
 from chalicelib.exchanges.gemini import GeminiClient
 
 def test_get_most_recent_trade():
@@ -79,3 +81,25 @@ def test_get_trade_value_usd():
     for trade, expected_result in zip(trades, expected_results):
         result = exchange.get_trade_value_usd(trade)
         assert result == expected_result
+
+def test_connect_reuses_client_while_markets_fresh():
+    exchange = GeminiClient("USD")
+    exchange.client = MagicMock()
+    exchange.markets_loaded_at = time.monotonic()
+
+    with patch("chalicelib.utils.APIKeyManager") as mock_key_manager:
+        assert exchange.connect("secret") is True
+
+    mock_key_manager.assert_not_called()
+    exchange.client.load_markets.assert_not_called()
+
+def test_connect_reloads_stale_markets():
+    exchange = GeminiClient("USD")
+    exchange.client = MagicMock()
+    exchange.markets_loaded_at = time.monotonic() - gemini.MARKETS_TTL_SECONDS - 1
+
+    with patch("chalicelib.utils.APIKeyManager") as mock_key_manager:
+        assert exchange.connect("secret") is True
+
+    mock_key_manager.assert_not_called()
+    exchange.client.load_markets.assert_called_once_with(reload=True)
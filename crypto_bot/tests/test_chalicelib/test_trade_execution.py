@@ -6,6 +6,7 @@ from chalicelib.trade_execution import (
     multi_strategy_allocation, 
     execute_long_stop, 
     buy_side_boost,
+    place_orders,
 )
 
 class MockExchange(Exchange):
@@ -65,6 +66,32 @@ def test_execute_long_stop(mock_exchange):
 def create_limit_order_side_effect_func(symbol, side, amount, order_price):
     return {'symbol': symbol, 'side': side, 'price': float(order_price), 'cost': float(round(order_price * amount, 2)), 'amount': float(round(amount, 4))}
 
+def test_place_orders_preserves_trade_order():
+    trades = [{"symbol": symbol} for symbol in ("BTC/USD", "ETH/USD", "SOL/USD")]
+
+    orders = place_orders(lambda trade: {"symbol": trade.get("symbol"), "action": "buy"}, trades)
+
+    assert [order.get("symbol") for order in orders] == ["BTC/USD", "ETH/USD", "SOL/USD"]
+
+def test_buy_side_boost_places_gemini_orders_sequentially():
+    exchange = Exchange("gemini", "USD")
+    exchange.client = MagicMock()
+    exchange.client.get_last_price.return_value = Decimal(str(50000))
+    exchange.client.get_total_currency.side_effect = [Decimal(str(.002)), Decimal(str(.01))]
+    exchange.client.create_limit_order.side_effect = create_limit_order_side_effect_func
+
+    trades = [
+        {"symbol": "BTC/USD", "currency": "BTC", "order_action": "sell", "percentage": Decimal(str(0.20))},
+        {"symbol": "ETH/USD", "currency": "ETH", "order_action": "sell", "percentage": Decimal(str(0.25))},
+    ]
+
+    with patch("chalicelib.trade_execution.ThreadPoolExecutor") as mock_executor:
+        result = buy_side_boost(exchange, trades)
+
+    mock_executor.assert_not_called()
+    assert exchange.concurrent_orders is False
+    assert [order.get("amount") for order in result] == [0.002, 0.01]
+
 def test_buy_side_boost_no_active_trades():
     exchange = MagicMock()
     exchange.get_account_allocation.return_value = {
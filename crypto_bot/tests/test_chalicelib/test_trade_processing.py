@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from decimal import Decimal
 from datetime import datetime
-from chalicelib.trade_processing import preprocess_trade_signal, get_ticker_recent_signals
+from chalicelib.trade_processing import preprocess_trade_signal, get_ticker_recent_signals, get_all_recent_signals
 
 @pytest.fixture
 def mock_dynamo_manager():
@@ -125,4 +125,23 @@ def test_get_recent_trade_signal_no_signals(mock_get_dynamodb_table):
         ExpressionAttributeValues={":ticker": ticker, ":cutoff_time": cutoff_time.isoformat()},
         ScanIndexForward=False
     )
-    assert result == []
\ No newline at end of file
+    assert result == []
+
+def test_get_all_recent_signals_shares_table(mock_get_dynamodb_table):
+    """Test case for reusing the table passed by the caller for all tickers."""
+    mock_table = MagicMock()
+    mock_table.query.side_effect = [
+        {"Items": [{"ticker": "SOLUSD", "create_ts": "2024-03-18T18:00:00Z"}]},
+        {"Items": [{"ticker": "BTCUSD", "create_ts": "2024-03-18T18:05:00Z"}]},
+    ]
+    cutoff_time = datetime(2024, 3, 18, 18, 0)
+
+    with patch("chalicelib.trade_processing.get_active_strategy_tickers", return_value=["SOLUSD", "BTCUSD"]):
+        result = get_all_recent_signals(cutoff_time, "tradesignals", mock_table)
+
+    mock_get_dynamodb_table.assert_not_called()
+    assert mock_table.query.call_count == 2
+    assert result == [
+        {"ticker": "SOLUSD", "create_ts": "2024-03-18T18:00:00Z"},
+        {"ticker": "BTCUSD", "create_ts": "2024-03-18T18:05:00Z"},
+    ]
@@ -1,7 +1,8 @@
 import pytest
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
-from chalicelib.utils import DynamoDBManager, get_trade_precedence
+from boto3.dynamodb.table import BatchWriter
+from chalicelib.utils import DynamoDBManager, batch_write_items, get_trade_precedence
 
 @pytest.fixture
 def mock_boto3_resource():
@@ -36,4 +37,30 @@ def test_get_trade_precedence():
     trade_symbols = ["ETH/USD", "BTC/USD"]
     result = get_trade_precedence(trade_symbols)
 
-    assert result == "ETH/USD"
\ No newline at end of file
+    assert result == "ETH/USD"
+
+def test_batch_write_items():
+    table = MagicMock()
+    batch = table.batch_writer.return_value.__enter__.return_value
+    items = [{"ticker": "BTCUSD", "create_ts": str(i)} for i in range(60)]
+
+    batch_write_items(table, items)
+
+    assert table.batch_writer.call_count == 3
+    table.batch_writer.assert_called_with(overwrite_by_pkeys=["ticker", "create_ts"])
+    assert batch.put_item.call_count == 60
+
+def test_batch_write_items_duplicate_keys():
+    client = MagicMock()
+    client.batch_write_item.return_value = {"UnprocessedItems": {}}
+    table = MagicMock()
+    table.batch_writer.side_effect = lambda overwrite_by_pkeys: BatchWriter("tradesignals", client, overwrite_by_pkeys=overwrite_by_pkeys)
+    items = [
+        {"ticker": "BTCUSD", "create_ts": "2024-03-18T08:00:00Z", "order_action": "buy"},
+        {"ticker": "BTCUSD", "create_ts": "2024-03-18T08:00:00Z", "order_action": "sell"},
+    ]
+
+    batch_write_items(table, items)
+
+    request_items = client.batch_write_item.call_args.kwargs["RequestItems"]["tradesignals"]
+    assert request_items == [{"PutRequest": {"Item": items[1]}}]